@@ -30,7 +30,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 # Optionally, define async_unload_entry if you want to support unloading config entries.
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
-    # Remove any services or clean up resources if needed.
+    # Flush any coalesced storage writes before letting go of the coordinator.
+    coordinator = hass.data.get(DOMAIN, {}).pop(const.COORDINATOR, None)
+    if coordinator is not None:
+        await coordinator.async_flush_all()
 
     _LOGGER.info("MediLog integration has been unloaded")
 
@@ -1,9 +1,12 @@
 """Coordinator for managing Medilog data and medications."""
 
+import asyncio
+from collections import defaultdict
 import logging
 from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
@@ -25,6 +28,11 @@ class MedilogCoordinator(DataUpdateCoordinator):
         self.storage_directory.mkdir(exist_ok=True)
         self.person_storages: dict[str, MedilogStorage] = {}
         self.medication_storage: MedicationStorage | None = None
+        # medication_id -> {(person_id, record_id)} reverse index
+        self._medication_usage: defaultdict[str, set[tuple[str, str]]] = defaultdict(
+            set
+        )
+        self._usage_indexed: set[str] = set()
         # No periodic polling needed, so update_interval is None.
         super().__init__(
             hass,
@@ -49,6 +57,32 @@ class MedilogCoordinator(DataUpdateCoordinator):
         # Perform migration if needed
         await self._async_migrate_medications()
 
+        # Build the medication usage index once; record mutations keep it current
+        self._rebuild_medication_usage()
+
+        # Writes are coalesced in memory, so flush them before shutdown
+        self.config_entry.async_on_unload(
+            self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_handle_stop
+            )
+        )
+
+    async def _async_handle_stop(self, event) -> None:
+        """Flush pending storage writes when Home Assistant stops."""
+        await self.async_flush_all()
+
+    async def async_flush_all(self) -> None:
+        """Flush pending writes of every loaded storage."""
+        tasks = [
+            storage.async_flush()
+            for storage in self.person_storages.values()
+            if storage.loaded
+        ]
+        if self.medication_storage:
+            tasks.append(self.medication_storage.async_flush())
+        if tasks:
+            await asyncio.gather(*tasks)
+
     def _on_medication_storage_changed(self):
         """Handle medication storage changes."""
         # Trigger an update when medications change
@@ -70,29 +104,16 @@ class MedilogCoordinator(DataUpdateCoordinator):
                 entity=entity_id,
                 file_path=str(file_path),
                 on_change_callback=self._on_storage_changed,
+                on_medication_ref_change=self._on_medication_ref_change,
             )
-            await storage.async_load()
             self.person_storages[entity_id] = storage
 
     def get_person_list(self):
         """Get list of persons with their most recent records."""
-        result = []
-        for entity_id, storage in self.person_storages.items():
-            recent_record = None
-            if storage.data and len(storage.data) > 0:
-                # Get the most recent record based on timestamp
-                records = storage.data.get("records", [])
-                recent_record = (
-                    max(
-                        records,
-                        key=lambda x: x.get("datetime", 0),
-                        default=None,
-                    )
-                    if records
-                    else None
-                )
-            result.append({"entity": entity_id, "recent_record": recent_record})
-        return result
+        return [
+            {"entity": entity_id, "recent_record": storage.recent_record}
+            for entity_id, storage in self.person_storages.items()
+        ]
 
     async def _async_update_data(self):
         """Update data.
@@ -102,14 +123,73 @@ class MedilogCoordinator(DataUpdateCoordinator):
         """
         return self.person_storages
 
-    def get_storage(self, person_id: str):
-        """Retrieve the storage for a specific person ID."""
-        return self.person_storages.get(person_id)
+    async def async_ensure_all_loaded(self) -> None:
+        """Make sure every person storage has been loaded from disk."""
+        pending = [s for s in self.person_storages.values() if not s.loaded]
+        if not pending:
+            return
+        # Independent disk reads; load them concurrently
+        await asyncio.gather(*(storage.async_ensure_loaded() for storage in pending))
+        for storage in pending:
+            self._index_storage_usage(storage)
+
+    async def async_get_storage(self, person_id: str):
+        """Retrieve the storage for a person, loading it on first use."""
+        storage = self.person_storages.get(person_id)
+        if storage is not None and not storage.loaded:
+            await storage.async_ensure_loaded()
+            self._index_storage_usage(storage)
+        return storage
 
     def get_medication_storage(self) -> MedicationStorage | None:
         """Get the medication storage instance."""
         return self.medication_storage
 
+    def _rebuild_medication_usage(self) -> None:
+        """Rebuild the medication usage index from the loaded person storages."""
+        usage: defaultdict[str, set[tuple[str, str]]] = defaultdict(set)
+        indexed: set[str] = set()
+        for storage in self.person_storages.values():
+            if not storage.loaded:
+                continue
+            indexed.add(storage.entity)
+            for record in storage.get_records():
+                med_id = record.get("medication_id")
+                if med_id:
+                    usage[med_id].add((storage.entity, record["id"]))
+        self._medication_usage = usage
+        self._usage_indexed = indexed
+
+    def _index_storage_usage(self, storage: MedilogStorage) -> None:
+        """Add a freshly loaded storage's records to the usage index."""
+        if storage.entity in self._usage_indexed:
+            return
+        self._usage_indexed.add(storage.entity)
+        for record in storage.get_records():
+            med_id = record.get("medication_id")
+            if med_id:
+                self._medication_usage[med_id].add((storage.entity, record["id"]))
+
+    def _on_medication_ref_change(
+        self,
+        entity_id: str,
+        record_id: str,
+        old_id: str | None,
+        new_id: str | None,
+    ) -> None:
+        """Apply a record's medication reference change to the usage index."""
+        if old_id == new_id:
+            return
+        key = (entity_id, record_id)
+        if old_id:
+            references = self._medication_usage.get(old_id)
+            if references is not None:
+                references.discard(key)
+                if not references:
+                    del self._medication_usage[old_id]
+        if new_id:
+            self._medication_usage[new_id].add(key)
+
     def is_medication_in_use(self, medication_id: str) -> bool:
         """Check if a medication is referenced by any records.
 
@@ -120,11 +200,7 @@ class MedilogCoordinator(DataUpdateCoordinator):
             True if medication is in use, False otherwise
 
         """
-        for storage in self.person_storages.values():
-            for record in storage.get_records():
-                if record.get("medication_id") == medication_id:
-                    return True
-        return False
+        return bool(self._medication_usage.get(medication_id))
 
     async def _async_migrate_medications(self):
         """Migrate old medication string fields to medication_id references."""
@@ -142,39 +218,50 @@ class MedilogCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Medication storage not initialized")
             return
 
-        # Collect all unique medication names from all person storages
-        medication_names = set()
-        for storage in self.person_storages.values():
-            for record in storage.get_records():
-                if record.get("medication"):
-                    medication_names.add(record["medication"])
+        # Migration has to look at every record, so load everything up front
+        await self.async_ensure_all_loaded()
 
-        # Create medication entries for each unique name
-        medication_map = {}  # old_name -> new_id
-        for name in medication_names:
-            med_id = await self.medication_storage.async_create_medication_from_name(
-                name
-            )
-            medication_map[name] = med_id
-            _LOGGER.debug("Created medication: %s -> %s", name, med_id)
+        # Fresh installs have nothing to migrate; skip the record passes
+        if not any(
+            storage.get_records() for storage in self.person_storages.values()
+        ):
+            migration_flag.touch()
+            _LOGGER.info("No records found, medication migration skipped")
+            return
 
-        # Update all records to use medication_id
+        # Rewrite records in a single pass, creating medications on first use
+        # of each name instead of collecting all names upfront.
+        medication_map = {}  # old_name -> new_id
         for storage in self.person_storages.values():
-            needs_save = False
             for record in storage.get_records():
                 if "medication" in record:
                     old_name = record["medication"]
-                    if old_name and old_name in medication_map:
-                        record["medication_id"] = medication_map[old_name]
+                    if old_name:
+                        med_id = medication_map.get(old_name)
+                        if med_id is None:
+                            med_id = await self.medication_storage.async_create_medication_from_name(
+                                old_name
+                            )
+                            medication_map[old_name] = med_id
+                            _LOGGER.debug(
+                                "Created medication: %s -> %s", old_name, med_id
+                            )
+                        record["medication_id"] = med_id
                         migration_count += 1
                     else:
                         record["medication_id"] = None
                     # Remove old medication field
                     del record["medication"]
-                    needs_save = True
+                    storage.mark_dirty()
+
+        # One save per touched storage, all in parallel, instead of saving
+        # inside the migration loop
+        await asyncio.gather(
+            *(s.async_save_if_dirty() for s in self.person_storages.values())
+        )
 
-            if needs_save:
-                await storage.async_save()
+        # Ensure the medications created above are on disk before flagging done
+        await self.medication_storage.async_flush()
 
         # Create migration flag file
         migration_flag.touch()
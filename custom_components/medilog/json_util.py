@@ -0,0 +1,39 @@
+"""JSON helpers for the Medilog component, preferring orjson when available."""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # Home Assistant ships orjson, but don't hard-require it
+    orjson = None
+
+# Reused encoders for the stdlib path; json.dumps builds a fresh encoder per
+# call. The data is acyclic JSON-safe dicts, so circular checks are skipped,
+# and ensure_ascii=False avoids escaping non-ASCII notes and names.
+_COMPACT_ENCODER = json.JSONEncoder(
+    separators=(",", ":"), ensure_ascii=False, check_circular=False
+)
+_INDENTED_ENCODER = json.JSONEncoder(
+    indent=2, ensure_ascii=False, check_circular=False
+)
+
+
+def json_dumps(data) -> bytes:
+    """Serialize data to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _COMPACT_ENCODER.encode(data).encode("utf-8")
+
+
+def json_dumps_indented(data) -> bytes:
+    """Serialize data to indented JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return _INDENTED_ENCODER.encode(data).encode("utf-8")
+
+
+def json_loads(raw):
+    """Deserialize JSON from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -2,16 +2,34 @@
 
 import asyncio
 import contextlib
-import datetime
-import json
+import hashlib
+import os
 from pathlib import Path
-import shutil
-import uuid
+
+from .json_util import json_dumps_indented, json_loads
 
 
 class MedicationStorage:
     """Storage class for managing Medication database."""
 
+    __slots__ = (
+        "file_path",
+        "on_change_callback",
+        "data",
+        "_by_id",
+        "_by_name",
+        "_last_hash",
+        "_dirty",
+        "_backups_enabled",
+        "_flush_task",
+        "_version",
+        "_medications_cache",
+        "_medications_cache_version",
+    )
+
+    BACKUP_COUNT = 3
+    SAVE_DELAY = 0.2
+
     def __init__(self, file_path: str, on_change_callback=None) -> None:
         """Initialize Medication storage.
 
@@ -21,57 +39,129 @@ class MedicationStorage:
 
         """
         self.file_path = Path(file_path)
+        # Ensure the parent directory exists once, not on every save
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
         self.on_change_callback = on_change_callback
         self.data = {"medications": []}
+        self._by_id: dict[str, dict] = {}
+        self._by_name: dict[str, dict] = {}
+        self._last_hash: bytes | None = None
+        self._dirty = False
+        self._backups_enabled = True
+        self._flush_task: asyncio.Task | None = None
+        self._version = 0
+        self._medications_cache: list | None = None
+        self._medications_cache_version = -1
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the id and name lookup indexes from the medication list."""
+        medications = self.data["medications"]
+        self._by_id = {med["id"]: med for med in medications if med.get("id")}
+        self._by_name = {med["name"]: med for med in medications if med.get("name")}
 
     async def async_load(self) -> None:
         """Load medications from storage file."""
-        if self.file_path.exists():
+
+        def load_bytes():
             try:
-                # Use asyncio.to_thread for file operations to avoid blocking
-                def load_data():
-                    with self.file_path.open(encoding="utf-8") as f:
-                        return json.load(f)
-
-                loaded_data = await asyncio.to_thread(load_data)
-                # Validate structure
-                if isinstance(loaded_data, dict) and "medications" in loaded_data:
-                    self.data = loaded_data
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.data = {"medications": []}
+                return self.file_path.read_bytes()
+            except OSError:
+                return None
+
+        # Single worker-thread hop: one read_bytes call, no separate stat
+        raw = await asyncio.to_thread(load_bytes)
+        loaded_data = None
+        if raw is not None:
+            with contextlib.suppress(ValueError):
+                loaded_data = json_loads(raw)
+        # Validate structure
+        if isinstance(loaded_data, dict) and "medications" in loaded_data:
+            self.data = loaded_data
         else:
             self.data = {"medications": []}
 
+        self._rebuild_indexes()
+        self._version += 1
+
+    def _rotate_backups(self) -> None:
+        """Rotate the bounded set of backup files, dropping the oldest."""
+        try:
+            for index in range(self.BACKUP_COUNT - 1, 0, -1):
+                backup = Path(f"{self.file_path}.bak.{index - 1}")
+                if backup.exists():
+                    os.replace(backup, f"{self.file_path}.bak.{index}")
+            os.replace(self.file_path, f"{self.file_path}.bak.0")
+        except OSError:
+            # The backup location is unusable; don't retry on every save
+            self._backups_enabled = False
+
     async def async_save(self) -> None:
-        """Save medications to storage file with backup."""
-        # First, create a backup of the existing file if it exists
-        if self.file_path.exists():
-            backup_suffix = datetime.datetime.now().isoformat().replace(":", "-")
-            backup_path = Path(f"{self.file_path}.{backup_suffix}")
-            # Use contextlib.suppress for backup failure
-            with contextlib.suppress(OSError):
-                await asyncio.to_thread(shutil.copy2, self.file_path, backup_path)
-
-        # Then save the current data using asyncio.to_thread
+        """Save medications to storage file, skipping writes when nothing changed."""
+        payload = json_dumps_indented(self.data)
+        new_hash = hashlib.blake2b(payload, digest_size=16).digest()
+        if new_hash == self._last_hash:
+            return
+
         def save_data():
-            # Ensure parent directory exists
-            self.file_path.parent.mkdir(parents=True, exist_ok=True)
-            with self.file_path.open("w", encoding="utf-8") as f:
-                json.dump(self.data, f, indent=2)
+            # Write to a temp file and rename into place so a crash can
+            # never leave a half-written medications file behind.
+            tmp_path = Path(f"{self.file_path}.tmp")
+            with tmp_path.open("wb") as f:
+                f.write(payload)
+                # Force the bytes to disk before the rename so a power
+                # loss can't publish an empty or truncated file
+                f.flush()
+                os.fsync(f.fileno())
+            if self._backups_enabled and self.file_path.exists():
+                self._rotate_backups()
+            os.replace(tmp_path, self.file_path)
 
         await asyncio.to_thread(save_data)
+        self._last_hash = new_hash
 
         if self.on_change_callback:
             self.on_change_callback()
 
+    def _schedule_save(self) -> None:
+        """Mark data dirty and schedule a coalesced background save."""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._delayed_flush()
+            )
+
+    async def _delayed_flush(self) -> None:
+        """Wait out the debounce window, then save if still dirty."""
+        await asyncio.sleep(self.SAVE_DELAY)
+        if self._dirty:
+            self._dirty = False
+            await self.async_save()
+
+    async def async_flush(self) -> None:
+        """Write any pending changes to disk immediately."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        self._flush_task = None
+        if self._dirty:
+            self._dirty = False
+            await self.async_save()
+
     def get_medications(self) -> list:
         """Get all medications.
 
+        Returns a snapshot list that is reused until the next mutation, so
+        repeated service calls don't rebuild or expose the live list.
+
         Returns:
             List of medication records
 
         """
-        return self.data["medications"]
+        if self._medications_cache_version != self._version:
+            self._medications_cache = list(self.data["medications"])
+            self._medications_cache_version = self._version
+        return self._medications_cache
 
     def get_medication(self, medication_id: str) -> dict | None:
         """Get a medication by ID.
@@ -83,10 +173,7 @@ class MedicationStorage:
             Medication record or None if not found
 
         """
-        for medication in self.data["medications"]:
-            if medication.get("id") == medication_id:
-                return medication
-        return None
+        return self._by_id.get(medication_id)
 
     def medication_exists(self, medication_id: str) -> bool:
         """Check if a medication exists by ID.
@@ -98,7 +185,7 @@ class MedicationStorage:
             True if medication exists, False otherwise
 
         """
-        return self.get_medication(medication_id) is not None
+        return medication_id in self._by_id
 
     def is_medication_name_unique(
         self, name: str, exclude_id: str | None = None
@@ -113,10 +200,8 @@ class MedicationStorage:
             True if name is unique, False otherwise
 
         """
-        for medication in self.data["medications"]:
-            if medication.get("name") == name and medication.get("id") != exclude_id:
-                return False
-        return True
+        existing = self._by_name.get(name)
+        return existing is None or existing.get("id") == exclude_id
 
     async def async_add_or_update_medication(
         self,
@@ -146,39 +231,44 @@ class MedicationStorage:
         if not self.is_medication_name_unique(name, exclude_id=id):
             raise ValueError(f"Medication with name '{name}' already exists.")
 
-        updated = False
-        result = None
-
         if id:
-            # Update existing medication
-            for medication in self.data["medications"]:
-                if medication.get("id") == id:
-                    medication["name"] = name
-                    medication["units"] = units
-                    medication["is_antipyretic"] = is_antipyretic
-                    medication["active_ingredient"] = active_ingredient
-                    updated = True
-                    result = medication
-                    break
-
-            if not updated:
+            # Update existing medication via the id index
+            medication = self._by_id.get(id)
+            if medication is None:
                 raise ValueError(f"Medication with ID '{id}' not found.")
+            if (name, units, is_antipyretic, active_ingredient) == (
+                medication.get("name"),
+                medication.get("units"),
+                medication.get("is_antipyretic"),
+                medication.get("active_ingredient"),
+            ):
+                # Unchanged form resubmission; nothing to write
+                return medication
+            old_name = medication.get("name")
+            medication["name"] = name
+            medication["units"] = units
+            medication["is_antipyretic"] = is_antipyretic
+            medication["active_ingredient"] = active_ingredient
+            if old_name != name:
+                self._by_name.pop(old_name, None)
+                self._by_name[name] = medication
+            result = medication
         else:
             # Create new medication
             new_medication = {
-                "id": uuid.uuid4().hex,
+                "id": os.urandom(16).hex(),
                 "name": name,
                 "units": units,
                 "is_antipyretic": is_antipyretic,
                 "active_ingredient": active_ingredient,
             }
             self.data["medications"].append(new_medication)
+            self._by_id[new_medication["id"]] = new_medication
+            self._by_name[name] = new_medication
             result = new_medication
 
-        await self.async_save()
-
-        if result is None:
-            raise ValueError("Failed to create or update medication")
+        self._version += 1
+        self._schedule_save()
 
         return result
 
@@ -201,15 +291,15 @@ class MedicationStorage:
                 f"Cannot delete medication with ID '{medication_id}' because it is referenced by one or more records."
             )
 
-        original_count = len(self.data["medications"])
-        self.data["medications"] = [
-            med for med in self.data["medications"] if med.get("id") != medication_id
-        ]
-
-        if len(self.data["medications"]) == original_count:
+        removed = self._by_id.pop(medication_id, None)
+        if removed is None:
             raise ValueError(f"Medication with ID '{medication_id}' not found.")
 
-        await self.async_save()
+        self.data["medications"].remove(removed)
+        self._by_name.pop(removed.get("name"), None)
+
+        self._version += 1
+        self._schedule_save()
 
     async def async_create_medication_from_name(self, name: str) -> str:
         """Create a medication from a name string (used during migration).
@@ -222,9 +312,9 @@ class MedicationStorage:
 
         """
         # Check if medication with this name already exists
-        for medication in self.data["medications"]:
-            if medication.get("name") == name:
-                return medication.get("id")
+        existing = self._by_name.get(name)
+        if existing is not None:
+            return existing.get("id")
 
         # Create new medication
         result = await self.async_add_or_update_medication(
@@ -24,28 +24,33 @@ SERVICE_DELETE_MEDICATION = "delete_medication"
 SERVICE_GET_MEDICATIONS = "get_medications"
 SERVICE_GET_MEDICATION = "get_medication"
 
+# Leaf validators built once and shared by every schema below
+_STRING = cv.string
+_BOOLEAN = cv.boolean
+_FLOAT = vol.Coerce(float)
+
 SERVICE_ADD_UPDATE_SCHEMA = vol.Schema(
     {
-        vol.Required("person_id"): cv.string,
-        vol.Optional("id"): cv.string,
-        vol.Required("datetime"): cv.string,
-        vol.Optional("temperature"): vol.Coerce(float),
-        vol.Optional("medication_id"): cv.string,
-        vol.Optional("medication_amount"): vol.Coerce(float),
-        vol.Optional("note"): cv.string,
+        vol.Required("person_id"): _STRING,
+        vol.Optional("id"): _STRING,
+        vol.Required("datetime"): _STRING,
+        vol.Optional("temperature"): _FLOAT,
+        vol.Optional("medication_id"): _STRING,
+        vol.Optional("medication_amount"): _FLOAT,
+        vol.Optional("note"): _STRING,
     }
 )
 
 SERVICE_DELETE_SCHEMA = vol.Schema(
     {
-        vol.Required("person_id"): cv.string,
-        vol.Required("id"): cv.string,
+        vol.Required("person_id"): _STRING,
+        vol.Required("id"): _STRING,
     }
 )
 
 SERVICE_GET_RECORDS_SCHEMA = vol.Schema(
     {
-        vol.Required("person_id"): cv.string,
+        vol.Required("person_id"): _STRING,
     }
 )
 
@@ -54,17 +59,17 @@ SERVICE_GET_PERSON_LIST_SCHEMA = vol.Schema({})
 # Medication service schemas
 SERVICE_ADD_UPDATE_MEDICATION_SCHEMA = vol.Schema(
     {
-        vol.Optional("id"): cv.string,
-        vol.Required("name"): cv.string,
-        vol.Optional("units"): cv.string,
-        vol.Optional("is_antipyretic"): cv.boolean,
-        vol.Optional("active_ingredient"): cv.string,
+        vol.Optional("id"): _STRING,
+        vol.Required("name"): _STRING,
+        vol.Optional("units"): _STRING,
+        vol.Optional("is_antipyretic"): _BOOLEAN,
+        vol.Optional("active_ingredient"): _STRING,
     }
 )
 
 SERVICE_DELETE_MEDICATION_SCHEMA = vol.Schema(
     {
-        vol.Required("id"): cv.string,
+        vol.Required("id"): _STRING,
     }
 )
 
@@ -72,39 +77,50 @@ SERVICE_GET_MEDICATIONS_SCHEMA = vol.Schema({})
 
 SERVICE_GET_MEDICATION_SCHEMA = vol.Schema(
     {
-        vol.Required("id"): cv.string,
+        vol.Required("id"): _STRING,
     }
 )
 
 
 def _create_record_handlers(coordinator: MedilogCoordinator):
     """Create record-related service handlers."""
+    # Resolve the coordinator attributes once; the handlers run per service call
+    _get_storage = coordinator.async_get_storage
+    _get_med_storage = coordinator.get_medication_storage
+    _ensure_all_loaded = coordinator.async_ensure_all_loaded
+    _get_person_list = coordinator.get_person_list
+    _error = _LOGGER.error
+    _info = _LOGGER.info
+    _info_enabled = _LOGGER.isEnabledFor
 
     async def handle_add_or_update(call):
-        person_id = call.data["person_id"]
-        record_id = call.data.get("id")
-        record_datetime = call.data["datetime"]
-        temperature = call.data.get("temperature")
-        medication_id = call.data.get("medication_id")
-        medication_amount = call.data.get("medication_amount", 1.0)
-        note = call.data.get("note")
+        # Read the validated mapping through one local instead of going
+        # through the call attribute for every field
+        data = call.data
+        person_id = data["person_id"]
+        record_id = data.get("id")
+        record_datetime = data["datetime"]
+        temperature = data.get("temperature")
+        medication_id = data.get("medication_id")
+        medication_amount = data.get("medication_amount", 1.0)
+        note = data.get("note")
 
         # Validate medication_id if provided
         if medication_id:
-            med_storage = coordinator.get_medication_storage()
+            med_storage = _get_med_storage()
             if not med_storage:
-                _LOGGER.error("Medication storage not initialized")
+                _error("Medication storage not initialized")
                 return
             if not med_storage.medication_exists(medication_id):
-                _LOGGER.error(
+                _error(
                     "Medication with ID '%s' not found. Please create the medication first",
                     medication_id,
                 )
                 return
 
-        storage = coordinator.get_storage(person_id)
+        storage = await _get_storage(person_id)
         if storage is None:
-            _LOGGER.error("No storage found for person: %s", person_id)
+            _error("No storage found for person: %s", person_id)
             return
 
         try:
@@ -116,38 +132,41 @@ def _create_record_handlers(coordinator: MedilogCoordinator):
                 medication_amount,
                 note,
             )
-            _LOGGER.info(
-                "Record added/updated for %s at %s with ID %s",
-                person_id,
-                record_datetime,
-                record_id,
-            )
+            if _info_enabled(logging.INFO):
+                _info(
+                    "Record added/updated for %s at %s with ID %s",
+                    person_id,
+                    record_datetime,
+                    record_id,
+                )
         except OSError as err:
-            _LOGGER.error("Error adding/updating record for %s: %s", person_id, err)
+            _error("Error adding/updating record for %s: %s", person_id, err)
 
     async def handle_delete_record(call):
-        person_id = call.data["person_id"]
-        record_id = call.data["id"]
+        data = call.data
+        person_id = data["person_id"]
+        record_id = data["id"]
 
-        storage = coordinator.get_storage(person_id)
+        storage = await _get_storage(person_id)
         if storage is None:
-            _LOGGER.error("No storage found for person: %s", person_id)
+            _error("No storage found for person: %s", person_id)
             return
 
         try:
             await storage.async_delete_record(record_id)
-            _LOGGER.info("Record deleted for %s with ID %s", person_id, record_id)
+            if _info_enabled(logging.INFO):
+                _info("Record deleted for %s with ID %s", person_id, record_id)
         except (ValueError, OSError) as err:
-            _LOGGER.error(
+            _error(
                 "Error deleting record for %s with ID %s: %s", person_id, record_id, err
             )
 
     async def handle_get_records(call) -> dict[str, Any]:
         """Handle get records service call."""
         person_id = call.data["person_id"]
-        storage = coordinator.get_storage(person_id)
+        storage = await _get_storage(person_id)
         if storage is None:
-            _LOGGER.error("No storage found for person: %s", person_id)
+            _error("No storage found for person: %s", person_id)
             return {"records": []}
 
         records = storage.get_records()
@@ -156,9 +175,11 @@ def _create_record_handlers(coordinator: MedilogCoordinator):
     async def handle_get_person_list(call) -> dict[str, Any]:
         """Handle get person list service call."""
         try:
-            person_list = coordinator.get_person_list()
+            # Recent records come from storage, so everything must be loaded
+            await _ensure_all_loaded()
+            person_list = _get_person_list()
         except OSError as err:
-            _LOGGER.error("Error retrieving person list: %s", err)
+            _error("Error retrieving person list: %s", err)
             return {"persons": []}
         else:
             return {"persons": person_list}
@@ -173,18 +194,26 @@ def _create_record_handlers(coordinator: MedilogCoordinator):
 
 def _create_medication_handlers(coordinator: MedilogCoordinator):
     """Create medication-related service handlers."""
+    # The med storage is a singleton on the coordinator; resolve the accessors once
+    _get_med_storage = coordinator.get_medication_storage
+    _ensure_all_loaded = coordinator.async_ensure_all_loaded
+    _med_in_use = coordinator.is_medication_in_use
+    _error = _LOGGER.error
+    _info = _LOGGER.info
+    _info_enabled = _LOGGER.isEnabledFor
 
     async def handle_add_or_update_medication(call):
         """Handle add or update medication service call."""
-        medication_id = call.data.get("id")
-        name = call.data["name"]
-        units = call.data.get("units")
-        is_antipyretic = call.data.get("is_antipyretic", False)
-        active_ingredient = call.data.get("active_ingredient")
-
-        med_storage = coordinator.get_medication_storage()
+        data = call.data
+        medication_id = data.get("id")
+        name = data["name"]
+        units = data.get("units")
+        is_antipyretic = data.get("is_antipyretic", False)
+        active_ingredient = data.get("active_ingredient")
+
+        med_storage = _get_med_storage()
         if med_storage is None:
-            _LOGGER.error("Medication storage not initialized")
+            _error("Medication storage not initialized")
             return
 
         try:
@@ -195,43 +224,47 @@ def _create_medication_handlers(coordinator: MedilogCoordinator):
                 is_antipyretic,
                 active_ingredient,
             )
-            _LOGGER.info(
-                "Medication %s: %s (ID: %s)",
-                "updated" if medication_id else "created",
-                name,
-                result["id"],
-            )
+            if _info_enabled(logging.INFO):
+                _info(
+                    "Medication %s: %s (ID: %s)",
+                    "updated" if medication_id else "created",
+                    name,
+                    result["id"],
+                )
         except ValueError as err:
-            _LOGGER.error("Error adding/updating medication: %s", err)
+            _error("Error adding/updating medication: %s", err)
         except OSError as err:
-            _LOGGER.error("Error saving medication: %s", err)
+            _error("Error saving medication: %s", err)
 
     async def handle_delete_medication(call):
         """Handle delete medication service call."""
         medication_id = call.data["id"]
 
-        med_storage = coordinator.get_medication_storage()
+        med_storage = _get_med_storage()
         if med_storage is None:
-            _LOGGER.error("Medication storage not initialized")
+            _error("Medication storage not initialized")
             return
 
-        # Check if medication is in use
+        # Usage is tracked per loaded storage, so load them all before checking
+        await _ensure_all_loaded()
+
         def check_usage(med_id):
-            return coordinator.is_medication_in_use(med_id)
+            return _med_in_use(med_id)
 
         try:
             await med_storage.async_delete_medication(medication_id, check_usage)
-            _LOGGER.info("Medication deleted with ID: %s", medication_id)
+            if _info_enabled(logging.INFO):
+                _info("Medication deleted with ID: %s", medication_id)
         except ValueError as err:
-            _LOGGER.error("Error deleting medication: %s", err)
+            _error("Error deleting medication: %s", err)
         except OSError as err:
-            _LOGGER.error("Error saving medication storage: %s", err)
+            _error("Error saving medication storage: %s", err)
 
     async def handle_get_medications(call) -> dict[str, Any]:
         """Handle get medications service call."""
-        med_storage = coordinator.get_medication_storage()
+        med_storage = _get_med_storage()
         if med_storage is None:
-            _LOGGER.error("Medication storage not initialized")
+            _error("Medication storage not initialized")
             return {"medications": []}
 
         medications = med_storage.get_medications()
@@ -241,9 +274,9 @@ def _create_medication_handlers(coordinator: MedilogCoordinator):
         """Handle get medication service call."""
         medication_id = call.data["id"]
 
-        med_storage = coordinator.get_medication_storage()
+        med_storage = _get_med_storage()
         if med_storage is None:
-            _LOGGER.error("Medication storage not initialized")
+            _error("Medication storage not initialized")
             return {"medication": None}
 
         medication = med_storage.get_medication(medication_id)
@@ -1,76 +1,320 @@
 """Storage management for Medilog custom component."""
 
 import asyncio
+from collections import deque
 import contextlib
-import datetime
-import json
+import hashlib
+from operator import itemgetter
+import os
 from pathlib import Path
-import shutil
-import uuid
+import re
+
+from .json_util import json_dumps, json_loads
+
+# Matches the entity field near the top of a snapshot without parsing it
+_ENTITY_PEEK = re.compile(rb'"entity"\s*:\s*"([^"]+)"')
 
 
 class MedilogStorage:
-    """Storage class for managing Medilog records."""
+    """Storage class for managing Medilog records.
+
+    On disk the storage is a JSON snapshot plus an append-only journal of
+    mutation events; mutations append one journal line instead of rewriting
+    the snapshot, and the journal is folded back into the snapshot when it
+    outgrows it.
+    """
 
-    def __init__(self, entity: str, file_path: str, on_change_callback=None) -> None:
+    __slots__ = (
+        "entity",
+        "file_path",
+        "file_name",
+        "_journal_path",
+        "on_change_callback",
+        "on_medication_ref_change",
+        "data",
+        "recent_record",
+        "_by_id",
+        "loaded",
+        "_load_lock",
+        "_write_lock",
+        "_dirty",
+        "_backups_enabled",
+        "_last_hash",
+        "_pending_events",
+        "_flush_task",
+        "_version",
+        "_records_cache",
+        "_records_cache_version",
+    )
+
+    # Compact once the journal grows past this multiple of the snapshot size
+    JOURNAL_COMPACT_FACTOR = 4
+    BACKUP_COUNT = 3
+    SAVE_DELAY = 0.5
+
+    def __init__(
+        self,
+        entity: str,
+        file_path: str,
+        on_change_callback=None,
+        on_medication_ref_change=None,
+    ) -> None:
         """Initialize Medilog storage.
 
         Args:
             entity: Entity identifier
             file_path: Path to the storage file
             on_change_callback: Optional callback function when data changes
+            on_medication_ref_change: Optional callback invoked with
+                (entity_id, record_id, old_medication_id, new_medication_id)
+                when a record's medication reference changes
 
         """
         self.entity = entity
         self.file_path = Path(file_path)
+        self.file_name = self.file_path.name
+        self._journal_path = self.file_path.with_suffix(".jsonl")
         self.on_change_callback = on_change_callback
-        self.data = {"entity": self.entity, "records": []}
+        self.on_medication_ref_change = on_medication_ref_change
+        # Records live in a deque so newest-first insertion is O(1)
+        self.data = {"entity": self.entity, "records": deque()}
+        self.recent_record: dict | None = None
+        self._by_id: dict[str, dict] = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._dirty = False
+        self._backups_enabled = True
+        self._last_hash: bytes | None = None
+        self._pending_events: list[bytes] = []
+        self._flush_task: asyncio.Task | None = None
+        self._version = 0
+        self._records_cache: list | None = None
+        self._records_cache_version = -1
 
-    async def async_load(self) -> None:
-        """Load records from storage file."""
-        if self.file_path.exists():
-            try:
-                # Use asyncio.to_thread for file operations to avoid blocking
-                def load_data():
-                    with self.file_path.open(encoding="utf-8") as f:
-                        return json.load(f)
+    def _compute_recent_record(self) -> None:
+        """Recompute the most recent record from scratch."""
+        records = self.data.get("records")
+        # Every record written by this integration carries a datetime, so the
+        # C-implemented itemgetter beats a lambda with a .get fallback here
+        self.recent_record = (
+            max(records, key=itemgetter("datetime")) if records else None
+        )
 
-                loaded_data = await asyncio.to_thread(load_data)
+    async def async_load(self) -> None:
+        """Load the snapshot and replay any journaled mutations on top."""
+        foreign_snapshot = False
+        try:
+            # One read_bytes syscall and a whole-buffer parse; a missing
+            # file raises instead of costing an extra exists() stat first
+            raw = await asyncio.to_thread(self.file_path.read_bytes)
+            # Peek at the entity field before parsing; a mismatched file
+            # would be discarded anyway, so don't pay for parsing it
+            peek = _ENTITY_PEEK.search(raw[:1024])
+            if peek is not None and peek.group(1) != self.entity.encode():
+                foreign_snapshot = True
+            else:
+                loaded_data = json_loads(raw)
                 if loaded_data.get("entity") == self.entity:
                     self.data = loaded_data
-            except (json.JSONDecodeError, FileNotFoundError):
-                self.data = {"entity": self.entity, "records": []}
-        else:
+                else:
+                    foreign_snapshot = True
+        except (ValueError, OSError):
             self.data = {"entity": self.entity, "records": []}
 
+        self.data["records"] = deque(self.data["records"])
+        self._by_id = {
+            record["id"]: record
+            for record in self.data["records"]
+            if "id" in record
+        }
+
+        if not foreign_snapshot:
+            # The journal belongs to the snapshot; never replay another
+            # entity's events over an empty store
+            journal_lines = await asyncio.to_thread(self._read_journal_lines)
+            if journal_lines:
+                self._replay_journal(journal_lines)
+
+        self._compute_recent_record()
+        self._version += 1
+        self.loaded = True
+
+    def _read_journal_lines(self) -> list[bytes]:
+        """Read the raw journal lines, or an empty list if there is none."""
+        try:
+            return self._journal_path.read_bytes().splitlines()
+        except OSError:
+            return []
+
+    def _replay_journal(self, lines: list[bytes]) -> None:
+        """Apply journaled upsert/delete events to the loaded records."""
+        records = self.data["records"]
+        index = self._by_id
+        for line in lines:
+            try:
+                event = json_loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-append; skip it
+                continue
+            op = event.get("op")
+            if op == "upsert":
+                record = event.get("record")
+                if not record or "id" not in record:
+                    continue
+                existing = index.get(record["id"])
+                if existing is not None:
+                    existing.clear()
+                    existing.update(record)
+                else:
+                    records.appendleft(record)
+                    index[record["id"]] = record
+            elif op == "delete":
+                removed = index.pop(event.get("id"), None)
+                if removed is not None:
+                    records.remove(removed)
+
+    async def async_ensure_loaded(self) -> None:
+        """Load from disk on first use; safe for concurrent callers."""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if not self.loaded:
+                await self.async_load()
+
+    def _rotate_backups(self) -> None:
+        """Rotate the bounded set of backup files, dropping the oldest."""
+        try:
+            for index in range(self.BACKUP_COUNT - 1, 0, -1):
+                backup = Path(f"{self.file_path}.bak.{index - 1}")
+                if backup.exists():
+                    os.replace(backup, f"{self.file_path}.bak.{index}")
+            os.replace(self.file_path, f"{self.file_path}.bak.0")
+        except OSError:
+            # The backup location is unusable; don't retry on every save
+            self._backups_enabled = False
+
     async def async_save(self) -> None:
-        """Save records to storage file with backup."""
-        # First, create a backup of the existing file if it exists
-        if self.file_path.exists():
-            backup_suffix = datetime.datetime.now().isoformat().replace(":", "-")
-            backup_path = Path(f"{self.file_path}.{backup_suffix}")
-            # Use contextlib.suppress for backup failure
-            with contextlib.suppress(OSError):
-                await asyncio.to_thread(shutil.copy2, self.file_path, backup_path)
-
-        # Then save the current data using asyncio.to_thread
-        def save_data():
-            with self.file_path.open("w", encoding="utf-8") as f:
-                json.dump(self.data, f, indent=2)
-
-        await asyncio.to_thread(save_data)
+        """Write a snapshot to disk, skipping the write when nothing changed."""
+        async with self._write_lock:
+            # A snapshot reflects the full in-memory state, so buffered
+            # journal events become redundant
+            self._pending_events.clear()
+            # orjson doesn't serialize deques, so snapshot through a list
+            payload = json_dumps(
+                {**self.data, "records": list(self.data["records"])}
+            )
+            new_hash = hashlib.blake2b(payload, digest_size=16).digest()
+            if new_hash == self._last_hash:
+                # Snapshot on disk is already current; the journal is redundant
+                with contextlib.suppress(OSError):
+                    await asyncio.to_thread(self._journal_path.unlink)
+                self._dirty = False
+                return
+
+            def save_data():
+                # Write to a temp file and rename into place so a crash can
+                # never leave a half-written snapshot behind
+                tmp_path = Path(f"{self.file_path}.tmp")
+                with tmp_path.open("wb") as f:
+                    f.write(payload)
+                    # Force the bytes to disk before the rename so a power
+                    # loss can't publish an empty or truncated snapshot
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._backups_enabled and self.file_path.exists():
+                    self._rotate_backups()
+                os.replace(tmp_path, self.file_path)
+                # The snapshot now contains everything the journal recorded
+                with contextlib.suppress(OSError):
+                    self._journal_path.unlink()
+
+            await asyncio.to_thread(save_data)
+            self._last_hash = new_hash
+            self._dirty = False
 
         if self.on_change_callback:
             self.on_change_callback(self.entity)
 
+    def _queue_event(self, event: dict) -> None:
+        """Buffer a journal event and schedule a coalesced background flush."""
+        self._pending_events.append(json_dumps(event) + b"\n")
+
+        if self.on_change_callback:
+            self.on_change_callback(self.entity)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._delayed_flush()
+            )
+
+    async def _delayed_flush(self) -> None:
+        """Wait out the debounce window, then write the buffered events."""
+        await asyncio.sleep(self.SAVE_DELAY)
+        await self._async_flush_events()
+
+    async def _async_flush_events(self) -> None:
+        """Append all buffered journal events in one write, compacting if needed."""
+        async with self._write_lock:
+            # Another flush or a snapshot save may have drained the buffer
+            # while we waited for the lock
+            if not self._pending_events:
+                return
+            lines = b"".join(self._pending_events)
+            self._pending_events.clear()
+
+            def append_lines() -> bool:
+                with self._journal_path.open("ab") as f:
+                    f.write(lines)
+                journal_size = self._journal_path.stat().st_size
+                try:
+                    snapshot_size = self.file_path.stat().st_size
+                except OSError:
+                    snapshot_size = 0
+                return journal_size > self.JOURNAL_COMPACT_FACTOR * snapshot_size
+
+            needs_compaction = await asyncio.to_thread(append_lines)
+
+        # Compaction takes the lock itself, so run it after releasing
+        if needs_compaction:
+            await self.async_compact()
+
+    async def async_flush(self) -> None:
+        """Write any pending journal events to disk immediately."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        self._flush_task = None
+        await self._async_flush_events()
+
+    async def async_compact(self) -> None:
+        """Fold the journal back into a fresh snapshot."""
+        await self.async_save()
+
+    def mark_dirty(self) -> None:
+        """Flag in-memory changes that still need to be written out."""
+        self._dirty = True
+
+    async def async_save_if_dirty(self) -> None:
+        """Save only when there are unsaved in-memory changes."""
+        if self._dirty:
+            await self.async_save()
+
     def get_records(self) -> list:
         """Get all records.
 
+        Returns a snapshot list that is reused until the next mutation, so
+        repeated service calls don't rebuild or expose the live list.
+
         Returns:
             List of records
 
         """
-        return self.data["records"]
+        if self._records_cache_version != self._version:
+            self._records_cache = list(self.data["records"])
+            self._records_cache_version = self._version
+        return self._records_cache
 
     async def async_add_or_update_record(
         self,
@@ -92,29 +336,61 @@ class MedilogStorage:
             note: Additional notes
 
         """
-        updated = False
-        for record in self.data["records"]:
-            if record.get("id") == id:
-                record["datetime"] = record_datetime
-                record["temperature"] = temperature
-                record["medication_id"] = medication_id
-                record["medication_amount"] = medication_amount
-                record["note"] = note
-                updated = True
-                break
-
-        if not updated:
-            new_record = {
-                "id": uuid.uuid4().hex,
+        old_medication_id = None
+        target = self._by_id.get(id) if id else None
+        if target is not None:
+            if (
+                record_datetime,
+                temperature,
+                medication_id,
+                medication_amount,
+                note,
+            ) == (
+                target.get("datetime"),
+                target.get("temperature"),
+                target.get("medication_id"),
+                target.get("medication_amount"),
+                target.get("note"),
+            ):
+                # Unchanged form resubmission; nothing to write or notify
+                return
+            old_medication_id = target.get("medication_id")
+            target["datetime"] = record_datetime
+            target["temperature"] = temperature
+            target["medication_id"] = medication_id
+            target["medication_amount"] = medication_amount
+            target["note"] = note
+        else:
+            target = {
+                # Ids are opaque keys; 16 random bytes match uuid4's entropy
+                # without constructing a UUID object
+                "id": os.urandom(16).hex(),
                 "datetime": record_datetime,
                 "temperature": temperature,
                 "medication_id": medication_id,
                 "medication_amount": medication_amount,
                 "note": note,
             }
-            self.data["records"].insert(0, new_record)
+            self.data["records"].appendleft(target)
+            self._by_id[target["id"]] = target
 
-        await self.async_save()
+        # Keep the cached most-recent record in sync without a full rescan
+        recent = self.recent_record
+        if recent is None:
+            self.recent_record = target
+        elif target is recent:
+            # The cached record itself changed; its datetime may have moved back
+            self._compute_recent_record()
+        elif record_datetime >= recent.get("datetime", ""):
+            self.recent_record = target
+
+        if self.on_medication_ref_change and old_medication_id != medication_id:
+            self.on_medication_ref_change(
+                self.entity, target["id"], old_medication_id, medication_id
+            )
+
+        self._version += 1
+        self._queue_event({"op": "upsert", "record": target})
 
     async def async_delete_record(self, record_id: str) -> None:
         """Delete a record by ID.
@@ -126,10 +402,15 @@ class MedilogStorage:
             ValueError: If record with specified ID not found
 
         """
-        original_count = len(self.data["records"])
-        self.data["records"] = [
-            record for record in self.data["records"] if record.get("id") != record_id
-        ]
-        if len(self.data["records"]) == original_count:
+        removed = self._by_id.pop(record_id, None)
+        if removed is None:
             raise ValueError("Record with the specified id not found.")
-        await self.async_save()
+        self.data["records"].remove(removed)
+        if self.recent_record is removed:
+            self._compute_recent_record()
+        if self.on_medication_ref_change and removed.get("medication_id"):
+            self.on_medication_ref_change(
+                self.entity, record_id, removed["medication_id"], None
+            )
+        self._version += 1
+        self._queue_event({"op": "delete", "id": record_id})